@@ -3,10 +3,49 @@ from tkinter import ttk, messagebox, filedialog
 import pandas as pd
 import numpy as np
 from datetime import datetime, date
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import os
+import queue
+import shutil
+import threading
+import uuid
 from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 import json
+import orjson
+import xlsxwriter
+
+SALES_COLUMNS = [
+    'Sale_ID', 'Date', 'Time', 'Customer_ID', 'Customer_Name', 
+    'Product_ID', 'Product_Name', 'Quantity', 'Unit_Price', 'Total_Amount', 'Payment_Method'
+]
+
+# Column dtypes applied to each table on load and after new rows are added
+INVENTORY_DTYPES = {
+    'Unit_Price': 'float64', 'Stock_Quantity': 'int32', 'Min_Stock_Level': 'int32',
+    'Category': 'category', 'Supplier': 'category'
+}
+
+SALES_DTYPES = {
+    'Sale_ID': 'string', 'Date': 'datetime64[ns]', 'Customer_ID': 'string', 'Product_ID': 'string',
+    'Product_Name': 'category', 'Quantity': 'int32', 'Unit_Price': 'float64', 'Total_Amount': 'float64',
+    'Payment_Method': 'category'
+}
+
+CUSTOMER_DTYPES = {'Total_Purchases': 'float64'}
+
+# Compression codec for every Parquet file the app writes
+PARQUET_COMPRESSION = "zstd"
+
+# Buffered sale rows are saved right away once this many accumulate
+SALES_FLUSH_ROWS = 2000
+
+# A month of sales is merged into one file once it holds this many files
+SALES_COMPACT_FILES = 16
+
+# Shopping list changes logged before the snapshot is rewritten
+SHOPPING_LOG_COMPACT_OPS = 1000
 
 class GroceryShopApp:
     def __init__(self, root):
@@ -21,19 +60,84 @@ class GroceryShopApp:
         self.create_directory_structure()
         
         # File paths
-        self.inventory_file = os.path.join(self.base_directory, "inventory.xlsx")
-        self.sales_file = os.path.join(self.base_directory, "sales_records.xlsx")
-        self.customers_file = os.path.join(self.base_directory, "customers.xlsx")
+        self.inventory_file = os.path.join(self.base_directory, "inventory.parquet")
+        self.sales_file = os.path.join(self.base_directory, "sales_records.parquet")
+        self.sales_dir = os.path.join(self.base_directory, "sales")
+        self.customers_file = os.path.join(self.base_directory, "customers.parquet")
         self.shopping_lists_file = os.path.join(self.base_directory, "shopping_lists.json")
+        self.shopping_log_file = os.path.join(self.base_directory, "shopping_lists.log.jsonl")
+        self.counters_file = os.path.join(self.base_directory, "counters.json")
         
         # Initialize data structures
         self.inventory = pd.DataFrame()
-        self.sales_records = pd.DataFrame()
         self.customers = pd.DataFrame()
         self.shopping_lists = {}
         self.current_cart = []
         self.current_customer = None
         
+        # Saves are written by a single background thread so the UI never waits on disk
+        self._io_executor = ThreadPoolExecutor(max_workers=1)
+        self._write_queue = queue.Queue()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Tables changed since the last flush; changes within 2 s are saved together
+        self._dirty = set()
+        self._flush_job = None
+        
+        # Sales history stays on disk, partitioned by month, and is read on demand.
+        # _pending_sales holds rows not yet saved; _sales_in_flight rows queued for
+        # the writer but not yet on disk. _sales_lock keeps reports from seeing a
+        # batch both on disk and in flight.
+        self._pending_sales = []
+        self._sales_in_flight = []
+        self._sales_committing = 0
+        self._sales_lock = threading.Lock()
+        
+        # Shopping list changes appended to the log since the last compaction;
+        # new log lines are buffered and written together after 1 s through a
+        # handle kept open between flushes. Each change carries a sequence number;
+        # the snapshot records the last one it includes.
+        self._shopping_log_ops = 0
+        self._shopping_seq = 0
+        self._shopping_log = None
+        self._shopping_log_buffer = []
+        self._shopping_log_job = None
+        
+        # Customer whose list the shopping list tree currently shows
+        self._shopping_tree_customer = None
+        
+        # Pending after() job for the debounced product search
+        self._filter_job = None
+        
+        # Values currently shown in each Treeview, keyed by item id (Product_ID / Customer_ID)
+        self._product_tree_iids = {}
+        self._inv_tree_iids = {}
+        self._customer_tree_iids = {}
+        
+        # Number of inventory rows rendered; more pages are added while scrolling
+        self._inventory_limit = 200
+        
+        # Set when products/customers are added so the combo value lists get rebuilt
+        self._inventory_dirty = True
+        self._customers_dirty = True
+        
+        # Row position lookups keyed by Product_ID / Customer_ID
+        self._product_idx = {}
+        self._customer_idx = {}
+        
+        # Product_Name -> {'id', 'price', 'stock'} for lookups that skip pandas
+        self._product_view = {}
+        
+        # Search columns and display prices, filled in by _rebuild_indexes
+        self._name_lower = np.array([], dtype=str)
+        self._id_lower = np.array([], dtype=str)
+        self._price_str = np.array([], dtype=str)
+        
+        # Next numeric suffix for generated Sale_IDs / Customer_IDs / Product_IDs
+        self._next_sale = 1
+        self._next_cust = 1
+        self._next_pid = 1
+        
         # Load existing data
         self.load_all_data()
         
@@ -51,37 +155,220 @@ class GroceryShopApp:
         """Load all existing data from files"""
         try:
             # Load inventory
-            if os.path.exists(self.inventory_file):
-                self.inventory = pd.read_excel(self.inventory_file)
+            inventory = self.load_table(self.inventory_file)
+            if inventory is not None:
+                self.inventory = self.apply_dtypes(inventory, INVENTORY_DTYPES)
             else:
                 self.initialize_sample_inventory()
             
-            # Load sales records
-            if os.path.exists(self.sales_file):
-                self.sales_records = pd.read_excel(self.sales_file)
-            else:
-                self.sales_records = pd.DataFrame(columns=[
-                    'Sale_ID', 'Date', 'Time', 'Customer_ID', 'Customer_Name', 
-                    'Product_ID', 'Product_Name', 'Quantity', 'Unit_Price', 'Total_Amount', 'Payment_Method'
-                ])
+            # Sales records are not loaded up front; only migrate a single-file history.
+            # The partitions are built in a temporary directory that replaces sales_dir
+            # in one step, so an interrupted migration simply runs again next start.
+            if not os.path.isdir(self.sales_dir):
+                sales_records = None
+                legacy_path = os.path.splitext(self.sales_file)[0] + ".xlsx"
+                if os.path.exists(self.sales_file):
+                    sales_records = pd.read_parquet(self.sales_file, engine="pyarrow")
+                elif os.path.exists(legacy_path):
+                    sales_records = self.read_excel_table(legacy_path)
+                
+                if sales_records is not None and len(sales_records) > 0:
+                    tmp_dir = os.path.join(self.base_directory, ".sales.tmp")
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    sales_records = self.apply_dtypes(sales_records, SALES_DTYPES)
+                    for tmp_path, path in self._write_sales_files(sales_records, tmp_dir):
+                        os.replace(tmp_path, path)
+                    os.replace(tmp_dir, self.sales_dir)
+                    self._sync_dirs([self.sales_dir])
+            
+            # Finish any month merge a crash interrupted before sales are read
+            if os.path.isdir(self.sales_dir):
+                for name in os.listdir(self.sales_dir):
+                    partition_dir = os.path.join(self.sales_dir, name)
+                    if os.path.exists(os.path.join(partition_dir, ".merge.json")):
+                        with self._sales_lock:
+                            self._finish_sales_merge(partition_dir)
             
             # Load customers  
-            if os.path.exists(self.customers_file):
-                self.customers = pd.read_excel(self.customers_file)
-            else:
-                self.customers = pd.DataFrame(columns=[
+            customers = self.load_table(self.customers_file)
+            if customers is None:
+                customers = pd.DataFrame(columns=[
                     'Customer_ID', 'Customer_Name', 'Phone', 'Email', 'Address', 'Registration_Date', 'Total_Purchases'
                 ])
+            self.customers = self.apply_dtypes(customers, CUSTOMER_DTYPES)
             
-            # Load shopping lists
+            # Load shopping lists: last snapshot plus any changes logged after it
+            snapshot = {}
             if os.path.exists(self.shopping_lists_file):
-                with open(self.shopping_lists_file, 'r') as f:
-                    self.shopping_lists = json.load(f)
+                with open(self.shopping_lists_file, 'rb') as f:
+                    snapshot = orjson.loads(f.read())
+            
+            # Older snapshots are a bare dict of lists without a sequence number
+            if isinstance(snapshot.get('seq'), int) and 'lists' in snapshot:
+                self._shopping_seq = snapshot['seq']
+                self.shopping_lists = snapshot['lists']
             else:
-                self.shopping_lists = {}
+                self.shopping_lists = snapshot
+            
+            # Skip changes the snapshot already holds; they are left in the log if
+            # the app stopped between writing the snapshot and emptying the log
+            logged = 0
+            if os.path.exists(self.shopping_log_file):
+                with open(self.shopping_log_file, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        logged += 1
+                        try:
+                            change = orjson.loads(line)
+                        except orjson.JSONDecodeError:
+                            break  # Last line cut short by a crash mid-write
+                        seq = change.get('seq', self._shopping_seq + 1)
+                        if seq > self._shopping_seq:
+                            self._apply_shopping_change(change)
+                            self._shopping_seq = seq
+            if logged:
+                self.save_shopping_lists()
+            
+            self._rebuild_indexes()
         
         except Exception as e:
             messagebox.showerror("Error", f"Error loading data: {str(e)}")
+        
+        self.load_counters()
+    
+    def load_counters(self):
+        """Load ID counters, never going below one past the highest IDs on file"""
+        # Kept apart from the other loads so their failures can't reset the counters.
+        # counters.json can lag behind the data it numbers, because the two are
+        # renamed into place separately, so the IDs on file are always checked too.
+        counters = {}
+        try:
+            with open(self.counters_file, 'r') as f:
+                counters = json.load(f)
+        except (OSError, ValueError):
+            pass
+        
+        try:
+            self._next_sale = max(counters.get('sale') or 1, self._next_id_number(self.load_sales(columns=['Sale_ID'])['Sale_ID']))
+            self._next_cust = max(counters.get('customer') or 1, self._next_id_number(self.customers['Customer_ID']))
+            self._next_pid = max(counters.get('product') or 1, self._next_id_number(self.inventory['Product_ID']))
+        except Exception as e:
+            # Starting from 1 would reissue IDs that are already on disk
+            messagebox.showerror("Error", f"Error loading ID counters: {str(e)}\nThe application will now close.")
+            raise SystemExit(1)
+    
+    def load_table(self, path):
+        """Load a table from Parquet, migrating a legacy Excel file if one exists"""
+        if os.path.exists(path):
+            return pd.read_parquet(path, engine="pyarrow")
+        
+        # Older versions stored data as .xlsx next to the Parquet path
+        legacy_path = os.path.splitext(path)[0] + ".xlsx"
+        if os.path.exists(legacy_path):
+            table = self.read_excel_table(legacy_path)
+            for tmp_path, final_path in self._write_parquet(path, table):
+                os.replace(tmp_path, final_path)
+            return table
+        
+        return None
+    
+    def apply_dtypes(self, table, dtypes):
+        """Cast the columns of a table that appear in a dtype mapping"""
+        return table.astype({col: dtype for col, dtype in dtypes.items() if col in table.columns})
+    
+    def load_sales(self, columns=None, start=None, end=None):
+        """Load sales from start (inclusive) to end (exclusive), reading only the given columns"""
+        # Month filters skip whole partitions; Date filters prune row groups within them
+        filters = []
+        if start is not None:
+            filters += [('Month', '>=', start.strftime('%Y-%m')), ('Date', '>=', start)]
+        if end is not None:
+            filters += [('Month', '<=', end.strftime('%Y-%m')), ('Date', '<', end)]
+        
+        with self._sales_lock:
+            if os.path.isdir(self.sales_dir):
+                sales = pd.read_parquet(self.sales_dir, engine="pyarrow", columns=columns, filters=filters or None)
+                sales = sales.drop(columns='Month', errors='ignore')
+            else:
+                sales = pd.DataFrame(columns=columns or SALES_COLUMNS)
+            unsaved = self._sales_in_flight + self._pending_sales
+        
+        # Include sales that haven't reached disk yet
+        if unsaved:
+            extra = self._materialize_sales(unsaved)
+            if start is not None:
+                extra = extra[extra['Date'] >= start]
+            if end is not None:
+                extra = extra[extra['Date'] < end]
+            sales = pd.concat([sales, extra[sales.columns]], ignore_index=True)
+        
+        return self.apply_dtypes(sales, SALES_DTYPES)
+    
+    def _materialize_sales(self, rows):
+        """Build a typed sales table from buffered sale rows in a single pass"""
+        return self.apply_dtypes(pd.DataFrame.from_records(rows, columns=SALES_COLUMNS), SALES_DTYPES)
+    
+    def read_excel_table(self, path):
+        """Stream the first worksheet of an Excel file into a DataFrame"""
+        # Read-only mode parses rows lazily instead of building the whole workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            columns = next(rows, ())
+            data = [row for row in rows if any(value is not None for value in row)]
+        finally:
+            workbook.close()
+        
+        return pd.DataFrame(data, columns=columns)
+    
+    def append_products(self, products):
+        """Append product records to the inventory in one typed concat"""
+        new_rows = pd.DataFrame.from_records(products)
+        
+        # Register unseen values first so categorical columns survive the concat
+        # without falling back to object dtype and needing a full re-cast
+        for col, dtype in INVENTORY_DTYPES.items():
+            if dtype == 'category':
+                unseen = set(new_rows[col]) - set(self.inventory[col].cat.categories)
+                if unseen:
+                    self.inventory[col] = self.inventory[col].cat.add_categories(sorted(unseen))
+        
+        new_rows = new_rows[self.inventory.columns].astype(self.inventory.dtypes.to_dict())
+        self.inventory = pd.concat([self.inventory, new_rows], ignore_index=True)
+        self._rebuild_indexes()
+        self._inventory_dirty = True
+    
+    def _next_id_number(self, ids):
+        """Return one past the highest number in a column of IDs like 'S0042'"""
+        numbers = pd.to_numeric(ids.astype(str).str.slice(1), errors='coerce')
+        return int(numbers.max()) + 1 if numbers.notna().any() else 1
+    
+    def _rebuild_indexes(self):
+        """Rebuild the ID to row position lookups after rows are added"""
+        self._product_idx = {pid: i for i, pid in enumerate(self.inventory['Product_ID'].to_numpy())}
+        self._customer_idx = {cid: i for i, cid in enumerate(self.customers['Customer_ID'].to_numpy())}
+        
+        # Lower-cased search columns so product filtering doesn't redo it per keystroke
+        self._name_lower = np.char.lower(self.inventory['Product_Name'].to_numpy(dtype=str))
+        self._id_lower = np.char.lower(self.inventory['Product_ID'].to_numpy(dtype=str))
+        
+        # Display prices, formatted once per inventory change rather than per refresh
+        self._price_str = np.char.mod('₹%.2f', self.inventory['Unit_Price'].to_numpy())
+        
+        self._on_inventory_changed()
+    
+    def _on_inventory_changed(self):
+        """Rebuild the product view after products are added or stock changes"""
+        rows = zip(
+            self.inventory['Product_Name'].tolist(), self.inventory['Product_ID'].tolist(),
+            self.inventory['Unit_Price'].tolist(), self.inventory['Stock_Quantity'].tolist()
+        )
+        # Built back to front so a duplicated name maps to its first row
+        self._product_view = {
+            name: {'id': pid, 'price': price, 'stock': stock}
+            for name, pid, price, stock in reversed(list(rows))
+        }
     
     def initialize_sample_inventory(self):
         """Initialize inventory with sample products"""
@@ -97,7 +384,7 @@ class GroceryShopApp:
                         'Supplier E', 'Supplier D', 'Supplier F', 'Supplier F', 'Supplier F']
         }
         
-        self.inventory = pd.DataFrame(sample_inventory)
+        self.inventory = self.apply_dtypes(pd.DataFrame(sample_inventory), INVENTORY_DTYPES)
         self.save_inventory()
     
     def create_widgets(self):
@@ -125,7 +412,7 @@ class GroceryShopApp:
         # Search products
         ttk.Label(left_frame, text="Search Product:").pack(anchor="w")
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", self.filter_products)
+        self.search_var.trace("w", self._schedule_filter)
         search_entry = ttk.Entry(left_frame, textvariable=self.search_var, width=30)
         search_entry.pack(fill="x", pady=5)
         
@@ -226,7 +513,8 @@ class GroceryShopApp:
             self.inventory_tree.column(col, width=120)
         
         scrollbar3 = ttk.Scrollbar(inventory_frame, orient="vertical", command=self.inventory_tree.yview)
-        self.inventory_tree.configure(yscroll=scrollbar3.set)
+        self.inventory_scrollbar = scrollbar3
+        self.inventory_tree.configure(yscroll=self._on_inventory_scroll)
         
         self.inventory_tree.pack(side="left", fill="both", expand=True, padx=10, pady=5)
         scrollbar3.pack(side="right", fill="y", pady=5)
@@ -334,77 +622,118 @@ class GroceryShopApp:
         ttk.Button(controls_frame, text="Low Stock Alert", command=self.show_low_stock).pack(side="left", padx=5)
         ttk.Button(controls_frame, text="Customer Report", command=self.generate_customer_report).pack(side="left", padx=5)
         
-        # Report display area
-        self.report_text = tk.Text(reports_frame, height=25, width=80)
+        # Report display area, read-only except while a report is written
+        self.report_text = tk.Text(reports_frame, height=25, width=80, state='disabled')
         scrollbar6 = ttk.Scrollbar(reports_frame, orient="vertical", command=self.report_text.yview)
         self.report_text.configure(yscroll=scrollbar6.set)
         
         self.report_text.pack(side="left", fill="both", expand=True, padx=10, pady=5)
         scrollbar6.pack(side="right", fill="y", pady=5)
     
+    def _schedule_filter(self, *args):
+        """Debounce search keystrokes so a burst of typing filters only once"""
+        if self._filter_job:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(120, self.filter_products)
+    
     def filter_products(self, *args):
         """Filter products based on search term"""
+        self._filter_job = None
         search_term = self.search_var.get().lower()
         
-        # Clear current items
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
+        # Show filtered items
+        mask = (np.char.find(self._name_lower, search_term) >= 0) | (np.char.find(self._id_lower, search_term) >= 0)
+        positions = np.flatnonzero(mask)
+        matches = self.inventory[['Product_ID', 'Product_Name', 'Stock_Quantity']].iloc[positions]
+        prices = self._price_str[positions]
+        rows = []
+        for (product_id, name, stock), price in zip(matches.itertuples(index=False, name=None), prices):
+            rows.append((product_id, (product_id, name, price, stock)))
         
-        # Add filtered items
-        for _, row in self.inventory.iterrows():
-            if search_term in row['Product_Name'].lower() or search_term in row['Product_ID'].lower():
-                self.product_tree.insert('', 'end', values=(
-                    row['Product_ID'], row['Product_Name'], f"₹{row['Unit_Price']:.2f}", row['Stock_Quantity']
-                ))
+        self._sync_tree(self.product_tree, self._product_tree_iids, rows)
+    
+    def _sync_tree(self, tree, shown, rows):
+        """Update a Treeview in place, touching only rows that appeared, vanished or changed"""
+        # rows are ordered (iid, values) pairs; shown maps each displayed iid to its values
+        wanted = {iid for iid, _ in rows}
+        stale = [iid for iid in shown if iid not in wanted]
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                del shown[iid]
+        
+        for position, (iid, values) in enumerate(rows):
+            if iid not in shown:
+                tree.insert('', position, iid=iid, values=values)
+            elif shown[iid] != values:
+                tree.item(iid, values=values)
+            shown[iid] = values
     
     def refresh_inventory_display(self):
         """Refresh the inventory display"""
-        # Clear current items
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
-        for item in self.inventory_tree.get_children():
-            self.inventory_tree.delete(item)
-        
-        # Add all products to both trees
-        for _, row in self.inventory.iterrows():
-            # Products tree
-            self.product_tree.insert('', 'end', values=(
-                row['Product_ID'], row['Product_Name'], f"₹{row['Unit_Price']:.2f}", row['Stock_Quantity']
-            ))
-            
-            # Inventory tree
-            stock_display = row['Stock_Quantity']
-            if row['Stock_Quantity'] <= row['Min_Stock_Level']:
-                stock_display = f"{row['Stock_Quantity']} (LOW!)"
-            
-            self.inventory_tree.insert('', 'end', values=(
-                row['Product_ID'], row['Product_Name'], row['Category'], 
-                f"₹{row['Unit_Price']:.2f}", stock_display, row['Min_Stock_Level'], row['Supplier']
-            ))
+        product_rows = []
+        
+        # Add all products to the products tree
+        columns = self.inventory[['Product_ID', 'Product_Name', 'Stock_Quantity']]
+        for (pid, name, stock), price in zip(columns.itertuples(index=False, name=None), self._price_str):
+            product_rows.append((pid, (pid, name, price, stock)))
+        
+        self._sync_tree(self.product_tree, self._product_tree_iids, product_rows)
+        
+        # Inventory tree only renders the pages scrolled into so far
+        inventory_rows = self._inventory_tree_rows(0, self._inventory_limit)
+        self._sync_tree(self.inventory_tree, self._inv_tree_iids, inventory_rows)
         
         # Update shopping list product combo
-        product_names = self.inventory['Product_Name'].tolist()
-        self.shopping_product_combo['values'] = product_names
+        if self._inventory_dirty:
+            product_names = self.inventory['Product_Name'].tolist()
+            self.shopping_product_combo['values'] = product_names
+            self._inventory_dirty = False
+    
+    def _inventory_tree_rows(self, start, stop):
+        """Build inventory tree (iid, values) pairs for a slice of the inventory"""
+        columns = self.inventory[['Product_ID', 'Product_Name', 'Category',
+                                  'Stock_Quantity', 'Min_Stock_Level', 'Supplier']].iloc[start:stop]
+        prices = self._price_str[start:stop]
+        rows = []
+        for (pid, name, cat, stock, minstock, supplier), price in zip(columns.itertuples(index=False, name=None), prices):
+            stock_display = stock
+            if stock <= minstock:
+                stock_display = f"{stock} (LOW!)"
+            
+            rows.append((pid, (
+                pid, name, cat, price, stock_display, minstock, supplier
+            )))
+        return rows
+    
+    def _on_inventory_scroll(self, first, last):
+        """Update the inventory scrollbar and render the next page near the bottom"""
+        self.inventory_scrollbar.set(first, last)
+        
+        shown = len(self._inv_tree_iids)
+        if float(last) > 0.9 and shown < len(self.inventory):
+            self._inventory_limit = shown + 200
+            for iid, values in self._inventory_tree_rows(shown, self._inventory_limit):
+                self.inventory_tree.insert('', 'end', iid=iid, values=values)
+                self._inv_tree_iids[iid] = values
     
     def refresh_customer_list(self):
         """Refresh the customer display"""
-        # Clear current items
-        for item in self.customer_tree.get_children():
-            self.customer_tree.delete(item)
-        
         # Add customers
-        customer_names = []
-        for _, row in self.customers.iterrows():
-            self.customer_tree.insert('', 'end', values=(
-                row['Customer_ID'], row['Customer_Name'], row['Phone'], 
-                row.get('Email', ''), f"₹{row.get('Total_Purchases', 0):.2f}"
-            ))
-            customer_names.append(f"{row['Customer_ID']} - {row['Customer_Name']}")
+        columns = self.customers[['Customer_ID', 'Customer_Name', 'Phone', 'Email', 'Total_Purchases']].to_numpy()
+        customer_rows = [
+            (cid, (cid, name, phone, email, f"₹{total:.2f}"))
+            for cid, name, phone, email, total in columns
+        ]
+        
+        self._sync_tree(self.customer_tree, self._customer_tree_iids, customer_rows)
         
         # Update customer combos
-        self.customer_combo['values'] = customer_names
-        self.shopping_customer_combo['values'] = customer_names
+        if self._customers_dirty:
+            customer_names = [f"{cid} - {name}" for cid, name in columns[:, :2]]
+            self.customer_combo['values'] = customer_names
+            self.shopping_customer_combo['values'] = customer_names
+            self._customers_dirty = False
     
     def add_to_cart(self):
         """Add selected product to shopping cart"""
@@ -418,7 +747,7 @@ class GroceryShopApp:
         product_id = item['values'][0]
         
         # Find product in inventory
-        product = self.inventory[self.inventory['Product_ID'] == product_id].iloc[0]
+        product = self.inventory.iloc[self._product_idx[product_id]]
         
         # Ask for quantity
         qty_dialog = tk.Toplevel(self.root)
@@ -467,9 +796,8 @@ class GroceryShopApp:
     
     def update_cart_display(self):
         """Update the shopping cart display"""
-        # Clear current cart display
-        for item in self.cart_tree.get_children():
-            self.cart_tree.delete(item)
+        # Clear current cart display in one call
+        self.cart_tree.delete(*self.cart_tree.get_children())
         
         # Add cart items
         total_amount = 0
@@ -515,47 +843,60 @@ class GroceryShopApp:
         
         try:
             # Extract customer ID
-            customer_id = customer_info.split(' - ')[0]
-            customer_name = customer_info.split(' - ')[1]
+            customer_id, customer_name = customer_info.split(' - ', 1)
             
             # Generate sale ID
-            sale_id = f"S{len(self.sales_records) + 1:04d}"
+            sale_id = f"S{self._next_sale:04d}"
+            self._next_sale += 1
             current_time = datetime.now()
             
+            # Fields shared by every line of this sale
+            base_record = {
+                'Sale_ID': sale_id,
+                'Date': pd.Timestamp(current_time.date()),
+                'Time': current_time.strftime('%H:%M:%S'),
+                'Customer_ID': customer_id,
+                'Customer_Name': customer_name,
+                'Payment_Method': self.payment_var.get()
+            }
+            
             # Process each item in cart
             total_sale_amount = 0
+            stock_deltas = defaultdict(int)
             for item in self.current_cart:
                 # Add to sales records
                 sale_record = {
-                    'Sale_ID': sale_id,
-                    'Date': current_time.strftime('%Y-%m-%d'),
-                    'Time': current_time.strftime('%H:%M:%S'),
-                    'Customer_ID': customer_id,
-                    'Customer_Name': customer_name,
+                    **base_record,
                     'Product_ID': item['product_id'],
                     'Product_Name': item['product_name'],
                     'Quantity': item['quantity'],
                     'Unit_Price': item['unit_price'],
-                    'Total_Amount': item['total'],
-                    'Payment_Method': self.payment_var.get()
+                    'Total_Amount': item['total']
                 }
                 
-                self.sales_records = pd.concat([self.sales_records, pd.DataFrame([sale_record])], ignore_index=True)
+                self._pending_sales.append(sale_record)
                 
-                # Update inventory stock
-                idx = self.inventory[self.inventory['Product_ID'] == item['product_id']].index[0]
-                self.inventory.loc[idx, 'Stock_Quantity'] -= item['quantity']
+                # Collect stock changes, applied to inventory once after the loop
+                stock_deltas[self._product_idx[item['product_id']]] += item['quantity']
                 
                 total_sale_amount += item['total']
             
+            # Update inventory stock
+            stock = self.inventory['Stock_Quantity'].to_numpy(copy=True)
+            stock[list(stock_deltas)] -= list(stock_deltas.values())
+            self.inventory['Stock_Quantity'] = stock
+            self._on_inventory_changed()
+            
             # Update customer total purchases
-            cust_idx = self.customers[self.customers['Customer_ID'] == customer_id].index
-            if len(cust_idx) > 0:
-                current_total = self.customers.loc[cust_idx[0], 'Total_Purchases']
-                self.customers.loc[cust_idx[0], 'Total_Purchases'] = current_total + total_sale_amount
+            cust_idx = self._customer_idx.get(customer_id)
+            if cust_idx is not None:
+                purchases_col = self.customers.columns.get_loc('Total_Purchases')
+                self.customers.iat[cust_idx, purchases_col] += total_sale_amount
             
             # Save all data
-            self.save_all_data()
+            self.mark_dirty('inventory', 'sales', 'customers', 'counters')
+            if len(self._pending_sales) >= SALES_FLUSH_ROWS:
+                self.save_sales_records()
             
             # Clear cart and refresh displays
             self.clear_cart()
@@ -596,12 +937,7 @@ class GroceryShopApp:
         def save_customer():
             try:
                 # Generate customer ID
-                if len(self.customers) > 0:
-                    last_id = self.customers['Customer_ID'].iloc[-1]
-                    new_id_num = int(last_id[1:]) + 1
-                    new_customer_id = f"C{new_id_num:03d}"
-                else:
-                    new_customer_id = "C001"
+                new_customer_id = f"C{self._next_cust:03d}"
                 
                 # Create new customer record
                 new_customer = {
@@ -619,10 +955,14 @@ class GroceryShopApp:
                     return
                 
                 # Add to customers dataframe
-                self.customers = pd.concat([self.customers, pd.DataFrame([new_customer])], ignore_index=True)
+                self.customers.loc[len(self.customers)] = new_customer
+                self.customers = self.apply_dtypes(self.customers, CUSTOMER_DTYPES)
+                self._next_cust += 1
+                self._rebuild_indexes()
+                self._customers_dirty = True
                 
                 # Save and refresh
-                self.save_customers()
+                self.mark_dirty('customers', 'counters')
                 self.refresh_customer_list()
                 
                 # Set as current customer
@@ -674,12 +1014,7 @@ class GroceryShopApp:
         def save_product():
             try:
                 # Generate product ID
-                if len(self.inventory) > 0:
-                    last_id = self.inventory['Product_ID'].iloc[-1]
-                    new_id_num = int(last_id[1:]) + 1
-                    new_product_id = f"P{new_id_num:03d}"
-                else:
-                    new_product_id = "P001"
+                new_product_id = f"P{self._next_pid:03d}"
                 
                 # Create new product
                 new_product = {
@@ -698,10 +1033,11 @@ class GroceryShopApp:
                     return
                 
                 # Add to inventory
-                self.inventory = pd.concat([self.inventory, pd.DataFrame([new_product])], ignore_index=True)
+                self.append_products([new_product])
+                self._next_pid += 1
                 
                 # Save and refresh
-                self.save_inventory()
+                self.mark_dirty('inventory', 'counters')
                 self.refresh_inventory_display()
                 
                 product_dialog.destroy()
@@ -721,11 +1057,11 @@ class GroceryShopApp:
             messagebox.showwarning("Warning", "Please select a product from inventory!")
             return
         
-        # Get selected product
-        item = self.inventory_tree.item(selection[0])
-        product_id = item['values'][0]
-        product_name = item['values'][1]
-        current_stock = item['values'][4].split(' ')[0]  # Remove (LOW!) if present
+        # Get selected product; tree rows are keyed by Product_ID
+        product_id = selection[0]
+        idx = self._product_idx[product_id]
+        product_name = self.inventory.iat[idx, self.inventory.columns.get_loc('Product_Name')]
+        current_stock = int(self.inventory.iat[idx, self.inventory.columns.get_loc('Stock_Quantity')])
         
         stock_dialog = tk.Toplevel(self.root)
         stock_dialog.title("Update Stock")
@@ -750,11 +1086,11 @@ class GroceryShopApp:
                     return
                 
                 # Update inventory
-                idx = self.inventory[self.inventory['Product_ID'] == product_id].index[0]
-                self.inventory.loc[idx, 'Stock_Quantity'] = new_quantity
+                self.inventory.iat[idx, self.inventory.columns.get_loc('Stock_Quantity')] = new_quantity
+                self._on_inventory_changed()
                 
                 # Save and refresh
-                self.save_inventory()
+                self.mark_dirty('inventory')
                 self.refresh_inventory_display()
                 
                 stock_dialog.destroy()
@@ -796,9 +1132,9 @@ class GroceryShopApp:
         
         customer_id = customer_info.split(' - ')[0]
         
-        # Clear current list display
-        for item in self.shopping_list_tree.get_children():
-            self.shopping_list_tree.delete(item)
+        # Clear current list display in one call
+        self.shopping_list_tree.delete(*self.shopping_list_tree.get_children())
+        self._shopping_tree_customer = customer_id
         
         # Load customer's shopping list
         if customer_id in self.shopping_lists:
@@ -826,10 +1162,6 @@ class GroceryShopApp:
             
             customer_id = customer_info.split(' - ')[0]
             
-            # Initialize shopping list if doesn't exist
-            if customer_id not in self.shopping_lists:
-                self.shopping_lists[customer_id] = []
-            
             # Add item to shopping list
             list_item = {
                 'product': product_name,
@@ -837,11 +1169,13 @@ class GroceryShopApp:
                 'notes': notes
             }
             
-            self.shopping_lists[customer_id].append(list_item)
-            
-            # Save and refresh
-            self.save_shopping_lists()
-            self.load_customer_shopping_list()
+            # Save and show the new row; a customer typed into the combo
+            # needs their whole list loaded first
+            self._record_shopping_change({'op': 'add', 'cust': customer_id, 'item': list_item})
+            if customer_id == self._shopping_tree_customer:
+                self.shopping_list_tree.insert('', 'end', values=(product_name, quantity, notes))
+            else:
+                self.load_customer_shopping_list()
             
             # Clear form
             self.shopping_product_var.set('')
@@ -867,15 +1201,20 @@ class GroceryShopApp:
             return
         
         customer_id = customer_info.split(' - ')[0]
+        
+        # The selection belongs to another customer's list if one was typed in
+        if customer_id != self._shopping_tree_customer:
+            self.load_customer_shopping_list()
+            messagebox.showwarning("Warning", "Shopping list reloaded for the selected customer. Please select the item again!")
+            return
+        
         item_index = self.shopping_list_tree.index(selection[0])
         
         # Remove from shopping list
         if customer_id in self.shopping_lists and item_index < len(self.shopping_lists[customer_id]):
-            self.shopping_lists[customer_id].pop(item_index)
-            
-            # Save and refresh
-            self.save_shopping_lists()
-            self.load_customer_shopping_list()
+            # Save and drop the removed row
+            self._record_shopping_change({'op': 'remove', 'cust': customer_id, 'index': item_index})
+            self.shopping_list_tree.delete(selection[0])
             
             messagebox.showinfo("Success", "Item removed from shopping list!")
     
@@ -888,11 +1227,11 @@ class GroceryShopApp:
         
         if messagebox.askyesno("Confirm", "Are you sure you want to clear the entire shopping list?"):
             customer_id = customer_info.split(' - ')[0]
-            self.shopping_lists[customer_id] = []
             
-            # Save and refresh
-            self.save_shopping_lists()
-            self.load_customer_shopping_list()
+            # Save and empty the list display
+            self._record_shopping_change({'op': 'clear', 'cust': customer_id})
+            self.shopping_list_tree.delete(*self.shopping_list_tree.get_children())
+            self._shopping_tree_customer = customer_id
             
             messagebox.showinfo("Success", "Shopping list cleared!")
     
@@ -915,30 +1254,27 @@ class GroceryShopApp:
         # Set customer
         self.customer_var.set(customer_info)
         
-        # Add each item to cart
-        items_added = 0
+        # Build cart items for listed products with enough stock
+        new_items = []
         for list_item in self.shopping_lists[customer_id]:
-            # Find product in inventory
-            product_match = self.inventory[self.inventory['Product_Name'] == list_item['product']]
+            product = self._product_view.get(list_item['product'])
+            if product is None:
+                continue
             
-            if len(product_match) > 0:
-                product = product_match.iloc[0]
-                
-                # Check stock availability
-                if product['Stock_Quantity'] >= list_item['quantity']:
-                    cart_item = {
-                        'product_id': product['Product_ID'],
-                        'product_name': product['Product_Name'],
-                        'quantity': list_item['quantity'],
-                        'unit_price': product['Unit_Price'],
-                        'total': list_item['quantity'] * product['Unit_Price']
-                    }
-                    
-                    self.current_cart.append(cart_item)
-                    items_added += 1
-                else:
-                    messagebox.showwarning("Stock Warning", 
-                                         f"Not enough stock for {product['Product_Name']}. Available: {product['Stock_Quantity']}, Requested: {list_item['quantity']}")
+            if product['stock'] >= list_item['quantity']:
+                new_items.append({
+                    'product_id': product['id'],
+                    'product_name': list_item['product'],
+                    'quantity': list_item['quantity'],
+                    'unit_price': product['price'],
+                    'total': list_item['quantity'] * product['price']
+                })
+            else:
+                messagebox.showwarning("Stock Warning", 
+                                     f"Not enough stock for {list_item['product']}. Available: {product['stock']}, Requested: {list_item['quantity']}")
+        
+        self.current_cart.extend(new_items)
+        items_added = len(new_items)
         
         # Update cart display
         self.update_cart_display()
@@ -952,106 +1288,114 @@ class GroceryShopApp:
         """Generate daily sales report"""
         today = datetime.now().strftime('%Y-%m-%d')
         
-        # Filter today's sales
-        if len(self.sales_records) > 0:
-            today_sales = self.sales_records[self.sales_records['Date'] == today]
-        else:
-            today_sales = pd.DataFrame()
+        # Load today's sales
+        day_start = pd.Timestamp(today)
+        today_sales = self.load_sales(
+            columns=['Sale_ID', 'Product_Name', 'Quantity', 'Total_Amount', 'Payment_Method'],
+            start=day_start, end=day_start + pd.Timedelta(days=1)
+        )
         
-        report = f"DAILY SALES REPORT - {today}\n"
-        report += "=" * 50 + "\n\n"
+        lines = [f"DAILY SALES REPORT - {today}", "=" * 50, ""]
         
         if len(today_sales) > 0:
-            total_sales = today_sales['Total_Amount'].sum()
-            total_transactions = len(today_sales['Sale_ID'].unique())
+            # Payment totals also give the day's total without another pass over the rows
+            payment_summary = today_sales.groupby('Payment_Method', observed=True)['Total_Amount'].sum()
+            total_sales = payment_summary.sum()
+            total_transactions = today_sales['Sale_ID'].nunique()
             
-            report += f"Total Sales: ₹{total_sales:.2f}\n"
-            report += f"Total Transactions: {total_transactions}\n"
-            report += f"Average Transaction: ₹{total_sales/total_transactions:.2f}\n\n"
+            lines.append(f"Total Sales: ₹{total_sales:.2f}")
+            lines.append(f"Total Transactions: {total_transactions}")
+            lines.append(f"Average Transaction: ₹{total_sales/total_transactions:.2f}")
+            lines.append("")
             
             # Sales by payment method
-            payment_summary = today_sales.groupby('Payment_Method')['Total_Amount'].sum()
-            report += "Sales by Payment Method:\n"
-            for method, amount in payment_summary.items():
-                report += f"  {method}: ₹{amount:.2f}\n"
+            lines.append("Sales by Payment Method:")
+            lines.extend(f"  {method}: ₹{amount:.2f}" for method, amount in payment_summary.items())
             
-            report += "\n"
+            lines.append("")
             
-            # Top selling products
-            product_summary = today_sales.groupby('Product_Name').agg({
-                'Quantity': 'sum',
-                'Total_Amount': 'sum'
-            }).sort_values('Total_Amount', ascending=False)
+            # Top selling products, selected without sorting every product
+            product_summary = today_sales.groupby('Product_Name', observed=True).agg(
+                Quantity=('Quantity', 'sum'),
+                Total_Amount=('Total_Amount', 'sum')
+            ).nlargest(10, 'Total_Amount')
             
-            report += "Top Selling Products:\n"
-            for product, data in product_summary.head(10).iterrows():
-                report += f"  {product}: {data['Quantity']} units, ₹{data['Total_Amount']:.2f}\n"
+            lines.append("Top Selling Products:")
+            lines.extend(
+                f"  {product}: {quantity} units, ₹{amount:.2f}"
+                for product, quantity, amount in product_summary.itertuples(name=None)
+            )
         else:
-            report += "No sales recorded for today.\n"
+            lines.append("No sales recorded for today.")
         
         # Display report
+        self.display_report("\n".join(lines) + "\n")
+    
+    def display_report(self, report):
+        """Replace the report area with a fully built report in a single insert"""
+        self.report_text.configure(state='normal')
         self.report_text.delete(1.0, tk.END)
         self.report_text.insert(1.0, report)
+        self.report_text.configure(state='disabled')
+        self.report_text.see(1.0)
     
     def show_low_stock(self):
         """Show low stock alert"""
-        low_stock_items = []
-        
-        for _, row in self.inventory.iterrows():
-            if row['Stock_Quantity'] <= row['Min_Stock_Level']:
-                low_stock_items.append(row)
-        
-        report = "LOW STOCK ALERT\n"
-        report += "=" * 30 + "\n\n"
-        
-        if low_stock_items:
-            report += f"Found {len(low_stock_items)} items with low stock:\n\n"
-            
-            for item in low_stock_items:
-                report += f"Product: {item['Product_Name']}\n"
-                report += f"  Current Stock: {item['Stock_Quantity']}\n"
-                report += f"  Minimum Level: {item['Min_Stock_Level']}\n"
-                report += f"  Supplier: {item['Supplier']}\n"
-                report += f"  Category: {item['Category']}\n\n"
+        low_stock_items = self.inventory.loc[
+            self.inventory['Stock_Quantity'] <= self.inventory['Min_Stock_Level'],
+            ['Product_Name', 'Stock_Quantity', 'Min_Stock_Level', 'Supplier', 'Category']
+        ]
+        
+        parts = ["LOW STOCK ALERT\n", "=" * 30, "\n\n"]
+        
+        if len(low_stock_items) > 0:
+            parts.append(f"Found {len(low_stock_items)} items with low stock:\n\n")
+            parts.extend(
+                f"Product: {name}\n"
+                f"  Current Stock: {stock}\n"
+                f"  Minimum Level: {min_stock}\n"
+                f"  Supplier: {supplier}\n"
+                f"  Category: {category}\n\n"
+                for name, stock, min_stock, supplier, category in low_stock_items.itertuples(index=False, name=None)
+            )
         else:
-            report += "All products are adequately stocked!\n"
+            parts.append("All products are adequately stocked!\n")
         
         # Display report
-        self.report_text.delete(1.0, tk.END)
-        self.report_text.insert(1.0, report)
+        self.display_report("".join(parts))
     
     def generate_customer_report(self):
         """Generate customer analysis report"""
-        report = "CUSTOMER ANALYSIS REPORT\n"
-        report += "=" * 40 + "\n\n"
+        parts = ["CUSTOMER ANALYSIS REPORT\n", "=" * 40, "\n\n"]
         
         if len(self.customers) > 0:
             total_customers = len(self.customers)
             total_customer_purchases = self.customers['Total_Purchases'].sum()
             avg_purchase = total_customer_purchases / total_customers if total_customers > 0 else 0
             
-            report += f"Total Customers: {total_customers}\n"
-            report += f"Total Customer Purchases: ₹{total_customer_purchases:.2f}\n"
-            report += f"Average Purchase per Customer: ₹{avg_purchase:.2f}\n\n"
+            parts.append(f"Total Customers: {total_customers}\n")
+            parts.append(f"Total Customer Purchases: ₹{total_customer_purchases:.2f}\n")
+            parts.append(f"Average Purchase per Customer: ₹{avg_purchase:.2f}\n\n")
             
             # Top customers
-            top_customers = self.customers.sort_values('Total_Purchases', ascending=False)
+            top_customers = self.customers.nlargest(10, 'Total_Purchases')[['Customer_Name', 'Total_Purchases']]
             
-            report += "Top 10 Customers by Purchase Amount:\n"
-            for i, (_, customer) in enumerate(top_customers.head(10).iterrows(), 1):
-                report += f"  {i}. {customer['Customer_Name']}: ₹{customer['Total_Purchases']:.2f}\n"
+            parts.append("Top 10 Customers by Purchase Amount:\n")
+            parts.extend(
+                f"  {i}. {name}: ₹{total:.2f}\n"
+                for i, (name, total) in enumerate(top_customers.itertuples(index=False, name=None), 1)
+            )
             
-            report += "\n"
+            parts.append("\n")
             
             # Customers with shopping lists
             customers_with_lists = len([cid for cid in self.shopping_lists if self.shopping_lists[cid]])
-            report += f"Customers with Active Shopping Lists: {customers_with_lists}\n"
+            parts.append(f"Customers with Active Shopping Lists: {customers_with_lists}\n")
         else:
-            report += "No customer data available.\n"
+            parts.append("No customer data available.\n")
         
         # Display report
-        self.report_text.delete(1.0, tk.END)
-        self.report_text.insert(1.0, report)
+        self.display_report("".join(parts))
     
     def export_inventory(self):
         """Export inventory to Excel file"""
@@ -1063,47 +1407,301 @@ class GroceryShopApp:
             )
             
             if filename:
-                self.inventory.to_excel(filename, index=False)
+                # Constant-memory mode flushes each row as it is written, so rows go out in order
+                workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+                try:
+                    worksheet = workbook.add_worksheet('Inventory')
+                    worksheet.write_row(0, 0, self.inventory.columns, workbook.add_format({'bold': True}))
+                    for row_num, row in enumerate(self.inventory.itertuples(index=False, name=None), 1):
+                        # Missing values are written as blank cells; xlsxwriter rejects NaN
+                        worksheet.write_row(row_num, 0, [None if pd.isna(value) else value for value in row])
+                except Exception:
+                    workbook.close()
+                    os.remove(filename)
+                    raise
+                else:
+                    workbook.close()
                 messagebox.showinfo("Success", f"Inventory exported to {filename}")
         
         except Exception as e:
             messagebox.showerror("Error", f"Error exporting inventory: {str(e)}")
     
-    def save_all_data(self):
-        """Save all data to files"""
-        self.save_inventory()
-        self.save_sales_records()
-        self.save_customers()
-        self.save_shopping_lists()
+    def mark_dirty(self, *tables):
+        """Record changed tables and schedule a batched save"""
+        self._dirty.update(tables)
+        if self._flush_job is None:
+            self._flush_job = self.root.after(2000, self.flush_dirty)
+    
+    def flush_dirty(self):
+        """Save every table changed since the last flush"""
+        if self._flush_job is not None:
+            self.root.after_cancel(self._flush_job)
+            self._flush_job = None
+        
+        savers = {
+            'inventory': self.save_inventory,
+            'sales': self.save_sales_records,
+            'customers': self.save_customers,
+            'counters': self.save_counters
+        }
+        dirty, self._dirty = self._dirty, set()
+        for table in dirty:
+            savers[table]()
     
     def save_inventory(self):
-        """Save inventory to Excel"""
-        try:
-            self.inventory.to_excel(self.inventory_file, index=False)
-        except Exception as e:
-            print(f"Error saving inventory: {str(e)}")
+        """Save inventory to Parquet"""
+        self._queue_write(self.inventory_file, "inventory", self._write_parquet, self.inventory.copy())
     
     def save_sales_records(self):
-        """Save sales records to Excel"""
-        try:
-            self.sales_records.to_excel(self.sales_file, index=False)
-        except Exception as e:
-            print(f"Error saving sales records: {str(e)}")
+        """Queue new sale rows, and any left from a failed save, to be appended to the sales dataset"""
+        if self._pending_sales or self._sales_in_flight:
+            self._sales_in_flight.extend(self._pending_sales)
+            self._pending_sales.clear()
+            self._queue_write(self.sales_dir, "sales records", self._write_sales, None)
     
     def save_customers(self):
-        """Save customers to Excel"""
+        """Save customers to Parquet"""
+        self._queue_write(self.customers_file, "customers", self._write_parquet, self.customers.copy())
+    
+    def save_shopping_lists(self):
+        """Compact shopping lists into the JSON snapshot and empty the change log"""
+        # The snapshot already includes any changes still waiting to be logged
+        if self._shopping_log_job is not None:
+            self.root.after_cancel(self._shopping_log_job)
+            self._shopping_log_job = None
+        self._shopping_log_buffer.clear()
+        
         try:
-            self.customers.to_excel(self.customers_file, index=False)
+            snapshot = {'seq': self._shopping_seq, 'lists': self.shopping_lists}
+            text = orjson.dumps(snapshot, default=str, option=orjson.OPT_INDENT_2).decode()
+            for tmp_path, path in self._write_text(self.shopping_lists_file, text):
+                os.replace(tmp_path, path)
+            if self._shopping_log is not None:
+                self._shopping_log.truncate(0)
+            else:
+                open(self.shopping_log_file, 'w').close()
+            self._shopping_log_ops = 0
         except Exception as e:
-            print(f"Error saving customers: {str(e)}")
+            print(f"Error saving shopping lists: {str(e)}")
     
-    def save_shopping_lists(self):
-        """Save shopping lists to JSON"""
+    def _apply_shopping_change(self, change):
+        """Apply one logged shopping list change to the in-memory lists"""
+        items = self.shopping_lists.setdefault(change['cust'], [])
+        if change['op'] == 'add':
+            items.append(change['item'])
+        elif change['op'] == 'remove':
+            # Ignore a remove that no longer points at an item instead of failing the replay
+            if 0 <= change['index'] < len(items):
+                items.pop(change['index'])
+        elif change['op'] == 'clear':
+            items.clear()
+    
+    def _record_shopping_change(self, change):
+        """Apply a shopping list change and queue it for the change log"""
+        self._shopping_seq += 1
+        change['seq'] = self._shopping_seq
+        self._apply_shopping_change(change)
+        self._shopping_log_buffer.append(orjson.dumps(change, default=str) + b"\n")
+        if self._shopping_log_job is None:
+            self._shopping_log_job = self.root.after(1000, self.flush_shopping_log)
+    
+    def flush_shopping_log(self):
+        """Append buffered shopping list changes to the change log in one write"""
+        if self._shopping_log_job is not None:
+            self.root.after_cancel(self._shopping_log_job)
+            self._shopping_log_job = None
+        if not self._shopping_log_buffer:
+            return
+        
         try:
-            with open(self.shopping_lists_file, 'w') as f:
-                json.dump(self.shopping_lists, f, indent=2, default=str)
+            if self._shopping_log is None:
+                self._shopping_log = open(self.shopping_log_file, 'ab')
+            self._shopping_log.write(b"".join(self._shopping_log_buffer))
+            self._shopping_log.flush()
+            self._shopping_log_ops += len(self._shopping_log_buffer)
+            self._shopping_log_buffer.clear()
         except Exception as e:
             print(f"Error saving shopping lists: {str(e)}")
+        
+        # Rewrite the snapshot periodically so the log stays short to replay
+        if self._shopping_log_ops >= SHOPPING_LOG_COMPACT_OPS:
+            self.save_shopping_lists()
+    
+    def save_counters(self):
+        """Save ID counters to JSON"""
+        text = json.dumps({'sale': self._next_sale, 'customer': self._next_cust, 'product': self._next_pid})
+        self._queue_write(self.counters_file, "ID counters", self._write_text, text)
+    
+    def _queue_write(self, path, label, write, data):
+        """Hand a snapshot of some data to the background writer"""
+        self._write_queue.put((path, label, write, data))
+        self._io_executor.submit(self._drain_writes)
+    
+    def _drain_writes(self):
+        """Write queued snapshots on the I/O thread, keeping only the newest per file"""
+        if self._write_queue.empty():
+            return
+        
+        latest = {}
+        while True:
+            try:
+                path, label, write, data = self._write_queue.get_nowait()
+            except queue.Empty:
+                break
+            latest[path] = (label, write, data)
+        
+        # Write everything to temporary files first and only then swap them in, so a
+        # crash mid-save can't leave a half-written file. Each file is replaced
+        # atomically, but the batch is not: a crash between renames can leave some
+        # files new and others old. Each writer returns the (temporary, final) paths
+        # it produced.
+        renames = []
+        for path, (label, write, data) in latest.items():
+            try:
+                renames.append((label, write, write(path, data)))
+            except Exception as e:
+                print(f"Error saving {label}: {str(e)}")
+        
+        # In-flight sale rows are only dropped once all their files are in place
+        renamed = []
+        with self._sales_lock:
+            for label, write, pairs in renames:
+                done = []
+                try:
+                    for tmp_path, path in pairs:
+                        os.replace(tmp_path, path)
+                        done.append(path)
+                except Exception as e:
+                    print(f"Error saving {label}: {str(e)}")
+                    if write == self._write_sales:
+                        # Take back the new sales files so the rows stay in flight and
+                        # are written exactly once by the next save
+                        try:
+                            for path in done:
+                                os.remove(path)
+                        except OSError as e:
+                            print(f"Error saving {label}: {str(e)}")
+                        continue
+                
+                renamed += done
+                if write == self._write_sales:
+                    del self._sales_in_flight[:self._sales_committing]
+            self._sales_committing = 0
+        
+        try:
+            self._sync_dirs(renamed)
+        except OSError as e:
+            print(f"Error saving files: {str(e)}")
+    
+    def _sync_dirs(self, paths):
+        """Flush the directories holding renamed files so the renames survive a power loss"""
+        # Directories can only be opened for fsync on POSIX systems
+        if os.name != 'posix':
+            return
+        for directory in {os.path.dirname(path) for path in paths}:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    
+    def _write_parquet(self, path, table):
+        """Write a table to a temporary Parquet file and flush it to disk"""
+        # Dot-prefixed temporary names are also skipped when the sales dataset is read
+        tmp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            table.to_parquet(f, engine="pyarrow", compression=PARQUET_COMPRESSION, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        return [(tmp_path, path)]
+    
+    def _write_text(self, path, text):
+        """Write text to a temporary file and flush it to disk"""
+        tmp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        return [(tmp_path, path)]
+    
+    def _write_sales(self, path, _):
+        """Write the sale rows currently in flight as new files in the sales dataset"""
+        rows = list(self._sales_in_flight)
+        
+        # Each save adds a file, so merge months that have collected many of them
+        for month in {row['Date'].strftime('%Y-%m') for row in rows}:
+            try:
+                self._compact_sales_partition(os.path.join(self.sales_dir, f"Month={month}"))
+            except Exception as e:
+                print(f"Error merging sales for {month}: {str(e)}")
+        
+        renames = self._write_sales_files(self._materialize_sales(rows))
+        self._sales_committing = len(rows)
+        return renames
+    
+    def _write_sales_files(self, sales, sales_dir=None):
+        """Write sales as one new file per Month=YYYY-MM partition, returning paths to rename"""
+        # Date-sorted files keep row-group Date ranges tight, so date filters skip more of them
+        sales = sales.sort_values('Date', kind='stable')
+        renames = []
+        for month, group in sales.groupby(sales['Date'].dt.strftime('%Y-%m')):
+            partition_dir = os.path.join(sales_dir or self.sales_dir, f"Month={month}")
+            os.makedirs(partition_dir, exist_ok=True)
+            renames += self._write_parquet(os.path.join(partition_dir, f"{uuid.uuid4().hex}.parquet"), group)
+        return renames
+    
+    def _compact_sales_partition(self, partition_dir):
+        """Merge the files of a month partition into one once there are enough of them"""
+        if not os.path.isdir(partition_dir):
+            return
+        sources = sorted(name for name in os.listdir(partition_dir)
+                         if name.endswith(".parquet") and not name.startswith("."))
+        if len(sources) < SALES_COMPACT_FILES:
+            return
+        
+        merged = pd.concat(
+            [pd.read_parquet(os.path.join(partition_dir, name), engine="pyarrow") for name in sources],
+            ignore_index=True
+        ).drop(columns='Month', errors='ignore')
+        merged = self.apply_dtypes(merged, SALES_DTYPES).sort_values('Date', kind='stable')
+        [(tmp_path, path)] = self._write_parquet(os.path.join(partition_dir, f"{uuid.uuid4().hex}.parquet"), merged)
+        
+        # The manifest is written only once the merged file is complete, so a merge
+        # it describes can always be finished on the next start
+        manifest = json.dumps({'merged': os.path.basename(tmp_path), 'final': os.path.basename(path), 'sources': sources})
+        for tmp_manifest, manifest_path in self._write_text(os.path.join(partition_dir, ".merge.json"), manifest):
+            os.replace(tmp_manifest, manifest_path)
+        
+        with self._sales_lock:
+            self._finish_sales_merge(partition_dir)
+    
+    def _finish_sales_merge(self, partition_dir):
+        """Swap a merged month file in for its sources as recorded in the merge manifest"""
+        manifest_path = os.path.join(partition_dir, ".merge.json")
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        
+        # Every step can be repeated safely if a crash interrupts this
+        merged_path = os.path.join(partition_dir, manifest['merged'])
+        if os.path.exists(merged_path):
+            os.replace(merged_path, os.path.join(partition_dir, manifest['final']))
+        for name in manifest['sources']:
+            source_path = os.path.join(partition_dir, name)
+            if os.path.exists(source_path):
+                os.remove(source_path)
+        os.remove(manifest_path)
+    
+    def on_close(self):
+        """Finish any pending saves before closing the window"""
+        self.flush_dirty()
+        
+        # Leave a compacted snapshot so the next start has no log to replay
+        if self._shopping_log_ops or self._shopping_log_buffer:
+            self.save_shopping_lists()
+        if self._shopping_log is not None:
+            self._shopping_log.close()
+        self._io_executor.shutdown(wait=True)
+        self.root.destroy()
 
 def main():
     """Main function to run the application"""